@@ -52,7 +52,7 @@ import string
 import sublime
 import sublime_plugin
 
-from User.sublime_helpers import MetaWindowFactory, MetaViewFactory, Viewport, sublime_is_visual, sublime_is_multiselect, pairwise, QuickPanelFinder
+from User.sublime_helpers import MetaWindowFactory, MetaViewFactory, Viewport, sublime_is_visual, sublime_is_multiselect, QuickPanelFinder
 
 
 # --------------------------------------------------------------------------------------------------
@@ -78,7 +78,7 @@ class VieCreateBookmark(sublime_plugin.TextCommand):
     ''' Creates a new bookmark from the selection '''
     def run(self, edit=None, character=None):
         ''' Runs the command '''
-        selection_regions = [selection for selection in self.view.sel()]
+        selection_regions = list(self.view.sel())
 
         bookmarker = VieBookmarker(view=self.view)
         bookmarker.add_mark(
@@ -126,8 +126,7 @@ class VieMarkPanel(metaclass=MetaViewFactory):
         self.viewport = None
         self.panel = None
 
-        for view in self.view.window().views():
-            view.erase_regions("vi_bookmarks_highlight")
+        self.bookmarker.reset_highlight()
 
     def open_marks_panel(self, view):
         '''
@@ -242,16 +241,112 @@ def mark_or_character(func):
     return wrapper
 
 
+# Preview highlight of the mark panel
+HIGHLIGHT_KEY = "vi_bookmarks_highlight"
+HIGHLIGHT_FLAGS = sublime.DRAW_SOLID_UNDERLINE | sublime.DRAW_EMPTY | sublime.DRAW_NO_FILL
+
+# Region name of each mark, built once since every lookup needs them
+BOOKMARK_KEYS = {char: "bookmark_" + char for char in string.printable}
+
+
+def bookmark_key(character):
+    ''' Returns the region name a mark is saved under '''
+    key = BOOKMARK_KEYS.get(character)
+    if key is None:
+        # Unusual mark, remember it too
+        key = BOOKMARK_KEYS[character] = "bookmark_" + character
+    return key
+
+
+class VieMarkIndex(metaclass=MetaWindowFactory):
+    '''
+    Remembers which view holds each mark
+
+    Shared by every bookmarker in the window (they all use the same region names)
+    Saves scanning every view each time a mark is looked up
+    '''
+
+    def __init__(self):
+        # character => view (only marks that were found, a miss is always scanned again)
+        self.views = {}
+
+    def find(self, character):
+        ''' Returns the view and regions for the mark, or (None, []) '''
+        view = self.views.get(character)
+        if view is None:
+            # Unknown, or missing last time (views can arrive carrying marks, e.g. dragged in from another window)
+            return self.scan(character)
+
+        # The view might have been closed, moved to another window, or had the mark erased
+        if view.is_valid() and view.window() == self.window:
+            regions = view.get_regions(bookmark_key(character))
+            if regions:
+                return view, regions
+
+        return self.scan(character)
+
+    def scan(self, character):
+        ''' Looks for the mark in every view, saving the result '''
+        # Only allow a mark to be in one view
+        # Otherwise multiselect really weird
+        key = bookmark_key(character)
+        for view in self.window.views():
+            regions = view.get_regions(key)
+
+            if len(regions) >= 1:
+                self.views[character] = view
+                return view, regions
+
+        # No Mark Found
+        self.views.pop(character, None)
+        return None, []
+
+    def scan_all(self, characters):
+        ''' Looks for many marks at once, going through the views only once '''
+        missing = list(characters)
+        for character in missing:
+            self.views.pop(character, None)
+
+        for view in self.window.views():
+            # The first view with the mark wins (same as scan)
+            found = [character for character in missing if view.get_regions(bookmark_key(character))]
+            for character in found:
+                self.views[character] = view
+
+            missing = [character for character in missing if character not in self.views]
+            if not missing:
+                break
+
+    def active_marks(self, characters):
+        ''' Filters the characters down to the ones that have a mark
+
+        Note: the found marks aren't checked again, use find() to get them (it re-scans stale ones)
+        '''
+        # Only the characters without a known view need a scan (all in one pass through the views)
+        unknown = [character for character in characters if character not in self.views]
+        if unknown:
+            self.scan_all(unknown)
+
+        return [character for character in characters if character in self.views]
+
+    def update(self, character, view=None):
+        ''' Records where the mark now lives (None when deleted) '''
+        if view is None:
+            self.views.pop(character, None)
+        else:
+            self.views[character] = view
+
+
 class VieBookmarker(metaclass=MetaWindowFactory):
     '''
     Bookmarks API
     '''
 
-    ALLOWED_MARKS = list(itertools.chain(
+    ALLOWED_MARKS = tuple(itertools.chain(
         string.ascii_lowercase,
         string.ascii_uppercase,
         string.whitespace,
-        (
+        sorted(
             set(string.punctuation)
             # Those two are used for special commands
             #   Thus are invalid mark registers
@@ -263,6 +358,13 @@ class VieBookmarker(metaclass=MetaWindowFactory):
         # "1234567890",
     ))
 
+    def __init__(self):
+        self._mark_cache = VieMarkIndex(window=self.window)
+
+        # What the preview highlight is currently showing
+        self._highlight_view = None
+        self._highlight_regions = None
+
     #------------------------------------------------------------------------------------------------
     # Public API
 
@@ -271,15 +373,8 @@ class VieBookmarker(metaclass=MetaWindowFactory):
         if character is None:
             return
 
-        # Only allow a mark to be in one view
-        # Otherwise multiselect really weird
-        view = None
-        for view in self.window.views():
-            regions = view.get_regions("bookmark_" + character)
-
-            if len(regions) >= 1:
-                break
-        else:
+        view, regions = self._mark_cache.find(character)
+        if view is None:
             # No Mark Found
             return
 
@@ -294,15 +389,28 @@ class VieBookmarker(metaclass=MetaWindowFactory):
         if choices is None:
             choices = self.ALLOWED_MARKS
 
-        for char in choices:
+        for char in self._mark_cache.active_marks(choices):
             mark = self.get_mark(char)
             if mark is not None:
                 yield mark
 
     def add_mark(self, character, view, regions):
         ''' Creates a new mark (overwriting existing ones) '''
-        self.delete_mark(character=character)
-        view.add_regions("bookmark_" + character, regions)
+        regions = list(regions)
+
+        # Compare against the live regions (edits move them), reading is cheaper than re-adding
+        old_view, old_regions = self._mark_cache.find(character)
+        if old_view == view and old_regions == regions:
+            # Already saved exactly like this
+            return
+
+        key = bookmark_key(character)
+        if old_view is not None and old_view != view:
+            old_view.erase_regions(key)
+
+        # Adding to the same view just replaces the old regions
+        view.add_regions(key, regions)
+        self._mark_cache.update(character, view)
 
     @mark_or_character
     def extend_to_mark(self, view):
@@ -331,39 +439,76 @@ class VieBookmarker(metaclass=MetaWindowFactory):
         full_line (bool): Whether to highlight the line of the match, or the exact match
             (select=False only)
         '''
+        self._go_to_mark(mark, select=select, full_line=full_line)
+
+    def _go_to_mark(self, mark, select=False, full_line=True):
+        ''' go_to_mark, for when you already have the mark '''
         if mark is None:
             return
 
         if select:
             mark.select()
-        else:
-            mark.show()
-
-            mark.view.add_regions(
-                # Region Name
-                "vi_bookmarks_highlight",
-                # Area to highlight
-                mark.full_lines if full_line else mark.regions,
-                # scope
-                "wordhighlight",
-                # icon
-                "bookmark",
-                # Flags
-                sublime.DRAW_SOLID_UNDERLINE | sublime.DRAW_EMPTY | sublime.DRAW_NO_FILL,
-            )
+            return
+
+        regions = mark.full_lines if full_line else mark.regions
+        same_view = mark.view == self._highlight_view
+        if same_view and regions == self._highlight_regions:
+            # Already previewing this exact spot
+            return
+
+        if not same_view:
+            # Only the tracked view is cleaned up later, don't leave this one behind
+            self.reset_highlight()
+
+        mark.show(focus=not same_view)
+
+        mark.view.add_regions(
+            # Region Name
+            HIGHLIGHT_KEY,
+            # Area to highlight
+            regions,
+            # scope
+            "wordhighlight",
+            # icon
+            "bookmark",
+            # Flags
+            HIGHLIGHT_FLAGS,
+        )
+        self._highlight_view = mark.view
+        self._highlight_regions = regions
+
+    def reset_highlight(self):
+        ''' Removes the preview highlight '''
+        # The highlight only ever lives in the view we last added it to
+        if self._highlight_view is not None:
+            self._highlight_view.erase_regions(HIGHLIGHT_KEY)
+
+        self._highlight_view = None
+        self._highlight_regions = None
 
     @mark_or_character
     def delete_mark(self, mark=None):
         ''' Erases a VI bookmark '''
+        self._delete_mark(mark)
+
+    def _delete_mark(self, mark):
+        ''' delete_mark, for when you already have the mark '''
         if mark is None:
             return
 
-        mark.view.erase_regions("bookmark_" + mark.name)
+        mark.view.erase_regions(bookmark_key(mark.name))
+        self._mark_cache.update(mark.name)
 
     def delete_all_marks(self):
         ''' Erases all Vi bookmarks '''
-        for mark in self.iter_marks():
-            self.delete_mark(mark=mark)
+        # The index already knows where each mark is, no need to build the marks
+        for char in self._mark_cache.active_marks(self.ALLOWED_MARKS):
+            # (find() makes sure the mark is still in this window)
+            view, _regions = self._mark_cache.find(char)
+            if view is not None:
+                view.erase_regions(bookmark_key(char))
+
+            self._mark_cache.update(char)
 
 
 class VieStack(VieBookmarker):
@@ -386,27 +531,39 @@ class VieStack(VieBookmarker):
         ''' Pushes a new item on to the other side. This assumes a full stack '''
         self.push(view, regions, inverted=True)
 
+    def _snapshot_stack(self):
+        ''' The (view, regions) held by each slot in the stack, (None, []) when empty '''
+        active = set(self._mark_cache.active_marks(self.ALLOWED_MARKS))
+
+        return [
+            self._mark_cache.find(char) if char in active else (None, [])
+            for char in self.ALLOWED_MARKS
+        ]
+
     def _shift_stack(self, inverted=False):
         ''' Helper for moving the items in the stack left/right'''
-        stack = list(pairwise(self.ALLOWED_MARKS))
-        if not inverted:
-            stack = reversed(stack)
+        old_slots = self._snapshot_stack()
 
         # Push all the characters back (erasing any overflow)
-        for cur_char, next_char in stack:
-            if inverted:
-                cur_char, next_char = next_char, cur_char
+        #   Empty slots don't move, whatever was already behind them stays
+        new_slots = list(old_slots)
+        for index in range(len(old_slots) - 1):
+            cur_index, next_index = (index + 1, index) if inverted else (index, index + 1)
 
-            # Some of these could be deleted
-            mark = self.get_mark(character=cur_char)
-            if mark is None:
+            if old_slots[cur_index][0] is not None:
+                new_slots[next_index] = old_slots[cur_index]
+
+        # Now only touch the slots that actually changed
+        for char, (old_view, old_regions), (view, regions) in zip(self.ALLOWED_MARKS, old_slots, new_slots):
+            if view == old_view and regions == old_regions:
                 continue
 
-            self.add_mark(
-                character=next_char,
-                view=mark.view,
-                regions=mark.regions,
-            )
+            key = bookmark_key(char)
+            if old_view is not None and old_view != view and old_view.is_valid():
+                old_view.erase_regions(key)
+
+            view.add_regions(key, regions)
+            self._mark_cache.update(char, view)
 
     def peek(self, inverted=False):
         ''' Returns the top item. Assumes a full stack '''
@@ -428,12 +585,12 @@ class VieStack(VieBookmarker):
         # Now find the last item in the stack
         # Since we shifted everything down by one
         # That item is the duplicated (copy)
-        for cur_char, next_char in pairwise(reversed(self.ALLOWED_MARKS), include_tail=True):
-            mark = self.get_mark(character=cur_char)
+        for char in reversed(self.ALLOWED_MARKS):
+            mark = self.get_mark(character=char)
 
             if mark is not None:
                 # This is the duplicate, kill it
-                self.delete_mark(mark=mark)
+                self._delete_mark(mark)
                 break
 
         return result
@@ -448,6 +605,14 @@ class VieStack(VieBookmarker):
 class VieMark:
     ''' Saved cursor position '''
 
+    # view id => {(change_count, begin, end, full_line): (line_num, sample_text)}
+    #   Edited views are dropped by VieMarkCacheListener
+    _TEXT_CACHE = {}
+    TEXT_CACHE_LIMIT = 512
+
+    # Longer previews just slow the quickpanel down (and don't fit anyways)
+    SAMPLE_TEXT_LIMIT = 200
+
     def __init__(self, view, regions=None, name=None, pretty_name=None):
         self.name = name
         self.pretty_name = pretty_name
@@ -469,13 +634,44 @@ class VieMark:
 
     def pretty(self, full_line=False):
         ''' Pretty pritns this mark as a string '''
-        row, col = self.view.rowcol(self.start_region.begin())
+        line_num, sample_text = self._text(full_line)
 
-        return "{mark}: #{line_num}: {sample_text}".format(
-            mark='{} "{}"'.format(self.pretty_name, self.name) if self.pretty_name else '"{}"'.format(self.name),
-            line_num=row + 1,
-            sample_text=self.view.substr(self.full_lines[0] if full_line else self.start_region),
-        )
+        if self.pretty_name:
+            return '{} "{}": #{}: {}'.format(self.pretty_name, self.name, line_num, sample_text)
+        return '"{}": #{}: {}'.format(self.name, line_num, sample_text)
+
+    def _text(self, full_line):
+        ''' Line number and text shown for this mark (cached until the view is edited) '''
+        start = self.start_region
+        key = (self.view.change_count(), start.a, start.b, full_line)
+
+        cache = self._TEXT_CACHE.setdefault(self.view.id(), {})
+        text = cache.get(key)
+        if text is None:
+            if len(cache) >= self.TEXT_CACHE_LIMIT:
+                # Moving selections (the visual stack) can pile up entries without any edits
+                cache.clear()
+
+            row, col = self.view.rowcol(start.begin())
+
+            # Only the first line is shown, don't expand every region
+            sample_region = self.view.line(start) if full_line else start
+            if sample_region.size() > self.SAMPLE_TEXT_LIMIT:
+                sample_text = self.view.substr(sublime.Region(
+                    sample_region.begin(),
+                    sample_region.begin() + self.SAMPLE_TEXT_LIMIT,
+                )) + '…'
+            else:
+                sample_text = self.view.substr(sample_region)
+
+            text = cache[key] = (row + 1, sample_text)
+
+        return text
+
+    @classmethod
+    def forget_view(cls, view):
+        ''' Drops the cached text of a view '''
+        cls._TEXT_CACHE.pop(view.id(), None)
 
     def select(self):
         ''' Selects the mark with the cursors '''
@@ -487,18 +683,30 @@ class VieMark:
         selection = self.view.sel()
 
         selection.clear()
-        for region in self.regions:
-            selection.add(region)
+        selection.add_all(self.regions)
 
-    def show(self):
+    def show(self, focus=True):
         ''' shows the mark on screen '''
         if not self.regions:
             return
 
-        self.view.window().focus_view(self.view)  # pylint: disable=no-member
+        if focus:
+            self.view.window().focus_view(self.view)  # pylint: disable=no-member
         self.view.show(self.start_region)
 
 
+class VieMarkCacheListener(sublime_plugin.EventListener):
+    ''' Keeps the VieMark text cache from going stale '''
+
+    def on_modified(self, view):
+        ''' Edits move the marks around, forget what we knew '''
+        VieMark.forget_view(view)
+
+    def on_close(self, view):
+        ''' The view is gone, so are its marks '''
+        VieMark.forget_view(view)
+
+
 
 
 
@@ -555,7 +763,7 @@ class ViePushBookmark(sublime_plugin.TextCommand):
     ''' Pushes a mark on to a work stack '''
     def run(self, edit=None):
         ''' Runs the command '''
-        selection_regions = [selection for selection in self.view.sel()]
+        selection_regions = list(self.view.sel())
 
         bookmarker = VieUserStack(view=self.view)
         bookmarker.push(
@@ -621,16 +829,16 @@ class VieShowUserStack(sublime_plugin.TextCommand):
 
 class VieUserStack(VieStack):
     ''' A Stack for user user '''
-    ALLOWED_MARKS = list(itertools.chain(
-        '!@#$%^&*()',
-    ))
+    ALLOWED_MARKS = tuple('!@#$%^&*()')
+    # Position of each mark in the stack
+    MARK_INDEX = {char: index for index, char in enumerate(ALLOWED_MARKS)}
 
     def get_mark(self, character):
         mark = super().get_mark(character)
         if mark is None:
             return None
 
-        index = self.ALLOWED_MARKS.index(mark.name)
+        index = self.MARK_INDEX[mark.name]
         mark.pretty_name = 'S{}'.format(index + 1)
 
         return mark
@@ -709,9 +917,7 @@ class VieShowVisualStack(sublime_plugin.TextCommand):
 
 class VieVisualStack(VieStack):
     ''' A stack for previous visual selections '''
-    ALLOWED_MARKS = list(itertools.chain(
-        '1234567890',
-    ))
+    ALLOWED_MARKS = tuple('1234567890')
 
 
 class VieVisualStackPanel(VieMarkPanel):
@@ -728,6 +934,10 @@ class VieVisualStackPanel(VieMarkPanel):
 
 class VisualModeListener(sublime_plugin.EventListener):
     ''' Stores the last used visual selection '''
+
+    # Selection changes come in bursts (e.g. mouse drags), only save them every so often (ms)
+    SAVE_DELAY = 50
+
     @classmethod
     def applies_to_primary_view_only(cls):
         ''' We want this to apply for just one view for the factory '''
@@ -736,11 +946,13 @@ class VisualModeListener(sublime_plugin.EventListener):
     def on_selection_modified(self, view):
         ''' Updates the last visual selection made '''
         saveable = sublime_is_visual(view) or sublime_is_multiselect(view)
-        updating = getattr(self, 'updating', False)
 
         if not saveable:
+            # The visual selection is over, make sure its final state is saved first
+            self.save_pending()
+
             # Nothing to do, but lets remember we're going to be pushing a new item now
-            if updating:
+            if getattr(self, 'updating', False):
                 self.updating = False
             return
 
@@ -749,8 +961,30 @@ class VisualModeListener(sublime_plugin.EventListener):
             # This is a quickpanel... not an actual window
             return
 
+        # Only the latest selection matters, if a save is already coming it'll pick this one up
+        scheduled = getattr(self, 'pending', None) is not None
+        self.pending = (view, list(view.sel()))
+        if not scheduled:
+            # Main thread (same as the events), so pending can't change under us
+            sublime.set_timeout(self.save_pending, self.SAVE_DELAY)
+
+    def save_pending(self):
+        ''' Saves the latest visual selection (if there is one waiting) '''
+        pending = getattr(self, 'pending', None)
+        if pending is None:
+            return
+        self.pending = None
+
+        view, selection = pending
+        if not view.is_valid():
+            return
+
+        updating = getattr(self, 'updating', False)
+        if updating and getattr(self, 'last_saved', None) == (view.id(), selection):
+            # Nothing moved since the last save (e.g. same mouse-drag frame)
+            return
+
         visual_stack = VieVisualStack(view=view)
-        selection = [region for region in view.sel()]
 
         if updating:
             # Old visual, keep updating it
@@ -760,6 +994,8 @@ class VisualModeListener(sublime_plugin.EventListener):
             visual_stack.push(view=view, regions=selection)
             self.updating = True
 
+        self.last_saved = (view.id(), selection)
+
 
 
 
@@ -8,78 +8,69 @@ def sublime_show_region(view, region):
         view.show_at_center(region)
 
 
-def isWhitespace(str):
-    return len(str.lstrip()) == 0
-
-
 
 class FoldSpecialCommand(sublime_plugin.TextCommand):
     FOLD_PATTERN = (
-        r"(it|itErrors)"
+        # Word boundary first, so things like "explicit(" bail out early
+        r"\b(?:it|itErrors)"
         r"\( *"
-        r"("
-            r"([']([^']|\\['])*')"
-            r"|([`]([^`]|\\[`])*`)"
-            r'|(["]([^"]|\\["])*")'
+        # Quoted string: an escape always eats the next char, so there's only one way to match
+        r"(?:"
+            r"'(?:[^'\\]|\\.)*'"
+            r"|`(?:[^`\\]|\\.)*`"
+            r'|"(?:[^"\\]|\\.)*"'
         r")"
 
         # Optional Second Argument
-        r"("
+        r"(?:"
             r" *, *"
             r"[^,]+"
         r")?"
 
-        r" *, *(function)? *\((done)?\) *(=>)? *{\n?"
+        r" *, *(?:function)? *\((?:done)?\) *(?:=>)? *{\n?"
     )
 
+    # Only test files get folded, no need to search anything else
+    SELECTOR = "source.js, source.jsx, source.ts, source.tsx"
+    # Searching huge buffers freezes the UI (chars)
+    SIZE_LIMIT = 4 * 1024 * 1024
+
     def run(self, edit=None, **kwargs):
-        selected = self.view.sel()
-        selection_backup = []
-        for region in selected:
-            selection_backup.append(region)
+        if not self.view.match_selector(0, self.SELECTOR):
+            return
+
+        if self.view.size() > self.SIZE_LIMIT:
+            sublime.status_message("Fold: file is too large to search")
+            return
+
+        selection_backup = list(self.view.sel())
 
         matched_regions = self.view.find_all(self.FOLD_PATTERN, re.DOTALL)
 
-        # Grab the point right after the region to fold
+        fold_regions = []
         for region in matched_regions:
+            # Grab the point right after the region to fold
             point = region.end() + 1
-            region.a = point
-            region.b = point
-
-            self.view.sel().clear()
-            self.view.sel().add(region)
-
-            # Inbuild Fold Command, needs a start + end to fold a region
-            # self.view.fold(matched_regions)
-            # Not as good, as it needs the selection to exist (thus we need to revert the selection + view)
-            # self.view.run_command('fold')
-            # Also not great as this changes selection
-            self.view.run_command('expand_selection', args={'to': 'scope'})
-
-            # Normalize the region: ensures reverse regions are flipped
-            fold_region = self.view.sel()[0]
-            fold_region = sublime.Region(
-                fold_region.begin(),
-                fold_region.end(),
-            )
-
-            # Strip starting spaces from a region
-            while fold_region.b > fold_region.a and isWhitespace(self.view.substr(fold_region.a).lstrip()):
-                fold_region.a += 1
-
-
-            # Strip trailing spaces from a region
-            while fold_region.b > fold_region.a and isWhitespace(self.view.substr(fold_region.b - 1)):
-                fold_region.b -= 1
-
-
-            self.view.fold(fold_region)
-
 
-        # Reset the cursor
-        self.view.sel().clear()
-        for region in selection_backup:
-            self.view.sel().add(region)
+            # The scope around that point is what gets folded
+            #   Same area as expand_selection to scope, but doesn't need to move the selection
+            #   (Normalized: begin comes first)
+            scope_region = self.view.extract_scope(point)
+
+            # Strip starting/trailing spaces from the region
+            #   (from a single copy of the text)
+            text = self.view.substr(scope_region)
+            stripped = text.lstrip()
+            leading = len(text) - len(stripped)
+            trailing = len(stripped) - len(stripped.rstrip())
+
+            fold_regions.append(sublime.Region(
+                scope_region.begin() + leading,
+                scope_region.end() - trailing,
+            ))
+
+        # Fold them all at once
+        self.view.fold(fold_regions)
 
         if len(selection_backup):
             sublime_show_region(self.view, selection_backup[0])
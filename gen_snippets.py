@@ -3,7 +3,7 @@
 2. Use \t to indicate indentation (sublime auto-converts)
 '''
 from collections import defaultdict
-import itertools
+from concurrent.futures import ThreadPoolExecutor
 import textwrap
 import os
 import re
@@ -11,44 +11,49 @@ from collections import abc
 
 import yaml
 try:
-    from jinja2 import Template
+    from yaml import CSafeLoader as SafeLoader
 except ImportError:
-    pass
-
-
-SNIPPET_RAW = None
-
-
-def init_jinja():
-    '''
-
-    Allows initializing jinja during runtime
-
-    Warning! files in the sublime folders get auto-run as plugins
-    ... but this is not a plugin?
-    '''
-
-    # Init Jinja2
-    #   (with autoescape)
-    global SNIPPET_RAW
-    SNIPPET_RAW = Template(
-        textwrap.dedent("""
-            <!-- Auto Generated, See the related .yaml file -->
-            <snippet>
-                <content><![CDATA[{{ snippet|safe }}]]></content>
-                <tabTrigger>{{ trigger }}</tabTrigger>
-
-                <scope>{{ scope }}</scope>
-                <description>{{ desc }}</description>
-            </snippet>
-        """),
-        autoescape=True,
+    from yaml import SafeLoader
+
+
+# The template has no logic, so plain formatting does the job
+#   (the snippet is raw CDATA, everything else is escaped)
+SNIPPET_RAW = textwrap.dedent("""
+    <!-- Auto Generated, See the related .yaml file -->
+    <snippet>
+        <content><![CDATA[{snippet}]]></content>
+        <tabTrigger>{trigger}</tabTrigger>
+
+        <scope>{scope}</scope>
+        <description>{desc}</description>
+    </snippet>""")
+
+# Threads used to write the snippet files
+WRITE_WORKERS = 8
+
+# Same escaping as jinja's autoescape
+XML_ESCAPES = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&#34;',
+    "'": '&#39;',
+})
+
+
+def render_snippet(snippet):
+    ''' Fills in the snippet template '''
+    return SNIPPET_RAW.format(
+        snippet=snippet['snippet'],
+        trigger=str(snippet['trigger']).translate(XML_ESCAPES),
+        scope=str(snippet['scope']).translate(XML_ESCAPES),
+        desc=str(snippet['desc']).translate(XML_ESCAPES),
     )
 
 
 def generate_snippets(in_file, out_path):
     with open(in_file) as in_fd:
-        raw_data = yaml.safe_load(in_fd.read())
+        raw_data = yaml.load(in_fd, Loader=SafeLoader)
 
     snippet_groups = raw_data['snippets']
     scope = raw_data['scope']
@@ -85,11 +90,13 @@ def generate_snippets(in_file, out_path):
             elif isinstance(entry.get('trigger', None), abc.Sequence):
                 entry['triggers'] = entry['trigger']
 
+            # Only the tags change between triggers
+            desc = entry['desc']
+            desc_text = ':'.join(desc)
+            entry_tags = [tag for tag in entry.get('tags', []) if tag not in desc]
+
             for trigger in entry['triggers']:
-                tags = [
-                    tag for tag in entry.get('tags', [])
-                    if (tag not in entry['desc']) and (tag not in trigger)
-                ]
+                tags = [tag for tag in entry_tags if tag not in trigger]
 
                 snippets.append({
                     **entry,
@@ -97,11 +104,12 @@ def generate_snippets(in_file, out_path):
                     # Warning! this purposely doesn't include the "trigger"
                     #    since it clutters the dropdown
                     #  However, this means the Command-Palette isn't searchable...
-                    'desc': ':'.join(itertools.chain(tags, entry['desc'])),
+                    'desc': ':'.join(tags + [desc_text]) if desc else ':'.join(tags),
                 })
 
     dups = defaultdict(int)
 
+    outputs = []
     for snippet in snippets:
         assert snippet["trigger"], "Need a trigger: {}".format(snippet)
 
@@ -118,32 +126,44 @@ def generate_snippets(in_file, out_path):
             ),
         )
 
-        with open(snippet_file, 'w') as out_fd:
-            out_fd.write(SNIPPET_RAW.render(snippet))
+        outputs.append((snippet_file, render_snippet(snippet)))
+
+    # Lots of tiny files, let the writes overlap
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as pool:
+        # list() so any write errors get raised here
+        list(pool.map(lambda output: write_file(*output), outputs))
+
+
+def write_file(path, content):
+    ''' Writes out a single file '''
+    with open(path, 'w') as out_fd:
+        out_fd.write(content)
+
+
+SLUG_RE = re.compile(r'[^\w\-. ]+')
 
 
 def slugify(filename):
-    return re.sub(r'[^\w\-. ]+', r'_', filename)
+    return SLUG_RE.sub('_', filename)
 
 
 def walk_files(path):
     ''' Returns only the files in the given tree '''
-    files = []
-    for root, dirs, files in os.walk(path, topdown=False):
-        yield from (
-            os.path.join(root, file)
-            for file in files
-        )
+    # scandir already knows the entry types, no need to stat each one
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file():
+                yield entry.path
 
 
 def main(path):
     # Find all the ".snippet_gen.yaml" files
-    walk_files(path)
-
     gen_files = [
         file
         for file in walk_files(path)
-        if re.match(r".*\.snippet_gen.yaml", file)
+        if file.endswith(".snippet_gen.yaml")
     ]
 
     for file in gen_files:
@@ -154,16 +174,13 @@ def main(path):
         )
 
         # Ensure the folder exists
-        if not os.path.exists(out_path):
-            os.mkdir(out_path)
-        else:
-            # Clear the old snippets
-            for old_snippet_file in os.listdir(out_path):
-                if old_snippet_file.endswith(".sublime-snippet"):
-                    os.remove(os.path.join(
-                        out_path,
-                        old_snippet_file,
-                    ))
+        os.makedirs(out_path, exist_ok=True)
+
+        # Clear the old snippets
+        with os.scandir(out_path) as old_snippets:
+            for old_snippet in old_snippets:
+                if old_snippet.name.endswith(".sublime-snippet"):
+                    os.remove(old_snippet.path)
 
         generate_snippets(
             in_file=file,
@@ -172,7 +189,6 @@ def main(path):
 
 
 if __name__ == '__main__':
-    init_jinja()
     main(".")
 
 
@@ -40,8 +40,12 @@ Vim Ex Commands
  :q     Close File
  :99    Go to line
 '''
+import bisect
 import functools
+import io
+import itertools
 import re
+import weakref
 
 import sublime
 import sublime_plugin
@@ -104,15 +108,23 @@ class InputPanelMixin(object):
             on_cancel=self.on_cancel,
         )
 
-        self.input_view.settings().set(self.__input_panel_name, True)
-        self.input_view.settings().set(self.__input_panel_name + 'Empty', True)
+        # Keep hold of the settings, on_change needs them every keystroke
+        self.__settings = self.input_view.settings()
+        self.__settings.set(self.__input_panel_name, True)
+        self.__settings.set(self.__input_panel_name + 'Empty', True)
+        self.__was_empty = True
 
     @with_view
     def check_empty(self, text):
         ''' Updates the 'empty' status of the input panel '''
         is_empty = text == ''
 
-        self.input_view.settings().set(self.__input_panel_name + 'Empty', is_empty)
+        # Only tell sublime when it actually changes
+        if is_empty == self.__was_empty:
+            return
+
+        self.__settings.set(self.__input_panel_name + 'Empty', is_empty)
+        self.__was_empty = is_empty
 
     def clear_input(self):
         ''' Cleans up the panel '''
@@ -144,6 +156,7 @@ class InputPanelMixin(object):
     _on_done = _on_cancel = _on_change = noop
 
 
+@functools.lru_cache(maxsize=512)
 def valid_regex(string):
     ''' Whether the string is a valid regular expression'''
     try:
@@ -153,20 +166,160 @@ def valid_regex(string):
     return True
 
 
-CAPS_RE = re.compile(r'[A-Z]')
+ASCII_CAPITALS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+def merge_regions(regions):
+    ''' Returns the regions sorted, with any that touch joined into one '''
+    merged = []
+    for region in sorted(regions, key=lambda region: region.begin()):
+        if merged and region.begin() <= merged[-1].end():
+            merged[-1] = merged[-1].cover(region)
+        else:
+            merged.append(region)
+    return merged
+
+
+@functools.lru_cache(maxsize=128)
+def words_regex(words, word_boundary=True):
+    ''' Returns the regex matching any of the given words (tuple)
+
+    Duplicates are dropped, and the longest words go first
+    so the alternation tries the full word before any shorter word it starts with
+    '''
+    boundary_char = r'\b' if word_boundary else ''
+
+    unique_words = []
+    seen_words = set()
+    for word in words:
+        if word not in seen_words:
+            seen_words.add(word)
+            unique_words.append(word)
+
+    # (sorted is stable, so same length words keep their order)
+    unique_words.sort(key=len, reverse=True)
+    word_regex = [escape_regex(word) for word in unique_words]
+
+    # The common case: every cursor is on the same word, no need for a group
+    template = '{boundary_char}({word}){boundary_char}'
+    if len(word_regex) == 1:
+        template = '{boundary_char}{word}{boundary_char}'
+
+    return template.format(
+        word='|'.join(word_regex),
+        boundary_char=boundary_char,
+    )
+
+
+def trie_regex(words):
+    ''' Returns a regex matching any of the words, with their common prefixes merged
+
+    ['foobar', 'foobaz', 'qux'] => '(?:fooba[rz]|qux)'
+
+    Where one word starts another, the longer one is tried first
+    '''
+    # char => child node, a None key marks the end of a word
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[None] = True
+
+    return _trie_node_regex(trie)
+
+
+def _trie_node_regex(node):
+    ''' Regex for everything after this trie node '''
+    branches = []
+    leaf_chars = []
+    for char in sorted(key for key in node if key is not None):
+        child = node[char]
+        text = escape_regex(char)
+
+        # Follow any chain of single chars without recursing (long selections make long chains)
+        while len(child) == 1 and None not in child:
+            (char, child), = child.items()
+            text += escape_regex(char)
+
+        if len(child) == 1:
+            # Only the end of a word left
+            if len(text) == 1 and (text.isalnum() or text == '_'):
+                leaf_chars.append(text)
+            else:
+                branches.append(text)
+        else:
+            branches.append(text + _trie_node_regex(child))
+
+    # Single char words can share a set
+    if len(leaf_chars) == 1:
+        branches += leaf_chars
+    elif leaf_chars:
+        branches.append('[{}]'.format(''.join(leaf_chars)))
+
+    regex = '|'.join(branches)
+    if None in node:
+        # A word ends here, the rest is optional
+        return '(?:{})?'.format(regex)
+    if len(branches) > 1:
+        return '(?:{})'.format(regex)
+    return regex
+
+
+def merge_ranges(ranges):
+    ''' Returns the (start, end) ranges sorted, with any that overlap joined into one '''
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def has_capitals(text):
+    ''' Whether the text has any (ASCII) capitals, which turns off ignore case '''
+    return not ASCII_CAPITALS.isdisjoint(text)
+
+
+# Regex metacharacters => their escaped version (for a single str.translate pass)
+REGEX_ESCAPE_TABLE = str.maketrans({
+    char: '\\' + char
+    for char in '()[]{}?*+-|^$\\.&~# \t\n\r\v\f'
+})
+
 
-LEFT_BRACKET_RE = re.compile(r'(?<!\\)\(')
-RIGHT_BRACKET_RE = re.compile(r'(?<!\\)\)')
+def escape_regex(text):
+    ''' Escapes the text so it can be used as a literal within a regex '''
+    return text.translate(REGEX_ESCAPE_TABLE)
+
+
+# Plain ASCII text with no regex special characters (matches itself literally)
+LITERAL_SEARCH_RE = re.compile(r'[^.\[\]{}()\\*+?|^$\x80-\U0010ffff]+\Z')
+
+
+def has_border(text):
+    ''' Whether the text starts the same way it ends (so two matches could overlap)
+
+    'abab' => True (ab)
+    'abc'  => False
+    '''
+    text = text.lower()
+    return any(text[:size] == text[-size:] for size in range(1, len(text)))
 
 
 class RegexText(list):
     ''' Used to represent raw text '''
     def __str__(self):
-        return '{}'.format(''.join(self))
+        return ''.join(self)
 
-    def complete(self):
+    def complete(self, buf=None):
         ''' Text has no children '''
-        return str(self)
+        if buf is None:
+            return str(self)
+
+        buf.write(''.join(self))
+        return None
 
 
 class RegexState(object):
@@ -178,7 +331,6 @@ class RegexState(object):
     End = object()
 
     ALLOWS = Any
-    START_RE = END_RE = None
     START_CHAR = END_CHAR = None
 
     def __init__(self):
@@ -203,21 +355,14 @@ class RegexState(object):
     def __str__(self):
         name = type(self).__name__
 
-        children = []
-        for child in self.children:
-
-            if isinstance(child, RegexState):
-                children.append(str(child))
-            else:
-                children.append(str(child))
-
-        if len(children):
-            return '<{} {}>'.format(name, ' '.join(children))
+        if self.children:
+            return '<{} {}>'.format(name, ' '.join(map(str, self.children)))
         return '<{}>'.format(name)
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def allowed_states(cls):
-        ''' Return the allowed states this can go too '''
+        ''' Return the allowed states this can go too (fixed per class, so its cached) '''
         # Figure out which states we can go to
         allowed_states = cls.ALLOWS
 
@@ -236,34 +381,58 @@ class RegexState(object):
             allowed_states.remove(RegexState.Self)
             allowed_states.add(cls)
 
-        return allowed_states
+        return frozenset(allowed_states)
 
     @classmethod
-    def lookup(cls):
-        ''' Returns the re lookup table '''
-        # Create the regex lookup chart
-        lookup = {}
+    @functools.lru_cache(maxsize=None)
+    def dispatch(cls):
+        ''' Lookup table of what each char does in this state (fixed per class, so its cached)
 
-        for state in cls.allowed_states():
-            lookup[state.START_RE] = state
+        Returns {char: state}, where the END_CHAR maps to the End sentinel instead
+        (Every start and end is a single char, so there's no need for a regex)
+        '''
+        table = {
+            state.START_CHAR: state
+            for state in cls.allowed_states()
+        }
 
-        return lookup
+        # Ending this state wins over anything else
+        if cls.END_CHAR is not None:
+            table[cls.END_CHAR] = RegexState.End
 
-    def complete(self):
-        ''' Returns an iterator of the completed regex '''
-        children = []
+        return table
 
-        if self.START_CHAR is not None:
-            children.append(self.START_CHAR)
+    def complete(self, buf=None):
+        ''' Returns the completed regex
 
-        # Put in the child text
-        for child in self.children:
-            children.append(child.complete())
+        buf:    Writes into this buffer instead (returning nothing)
+                Children all share the one buffer, so each piece of text is only copied once
 
-        if self.END_CHAR is not None:
-            children.append(self.END_CHAR)
+        Walks the tree with a stack instead of recursion (user input can nest deeply)
+        '''
+        out = io.StringIO() if buf is None else buf
 
-        return ''.join(children)
+        # Either states/text still to complete, or an END_CHAR waiting to be closed
+        stack = [self]
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, str):
+                out.write(node)
+            elif isinstance(node, RegexText):
+                out.write(''.join(node))
+            else:
+                if node.START_CHAR is not None:
+                    out.write(node.START_CHAR)
+                if node.END_CHAR is not None:
+                    stack.append(node.END_CHAR)
+
+                # Put in the child text (reversed, so the first child pops first)
+                stack.extend(reversed(node.children))
+
+        if buf is None:
+            return out.getvalue()
+        return None
 
 
 class RegexSet(RegexState):
@@ -271,8 +440,6 @@ class RegexSet(RegexState):
     ALLOWS = [
         RegexState.Self,
     ]
-    START_RE = re.compile(r'\[')
-    END_RE = re.compile(r'\]')
     START_CHAR = '['
     END_CHAR = ']'
 
@@ -280,16 +447,12 @@ class RegexSet(RegexState):
 class RegexNum(RegexState):
     ''' {0,3} multipliers '''
     ALLOWS = []
-    START_RE = re.compile(r'\{')
-    END_RE = re.compile(r'\}')
     START_CHAR = '{'
     END_CHAR = '}'
 
 
 class RegexGroup(RegexState):
     ''' (...) Groups '''
-    START_RE = re.compile(r'\(')
-    END_RE = re.compile(r'\)')
     START_CHAR = '('
     END_CHAR = ')'
 
@@ -299,37 +462,41 @@ def _parse_completable_regex(text):
     top_state = RegexState()
     states = [top_state]
 
-    while len(text):
+    # Walk the text with an index (slicing off the front each time copies the whole rest)
+    index = 0
+    length = len(text)
+    while index < length:
         current_state = states[-1]
+        char = text[index]
 
-        if text[0] == '\\':
+        if char == '\\':
             # This drops the escape char + the next char
-            current_state.add_text(text[:2])
-            text = text[2:]
+            current_state.add_text(text[index:index + 2])
+            index += 2
             continue
 
-        # Check if this state just ended
-        elif current_state.END_RE and current_state.END_RE.match(text) is not None:
-            text = text[1:]
+        # One lookup tells us if this state ended, or which new one starts
+        next_state = current_state.dispatch().get(char)
+
+        if next_state is None:
+            # Useless char, ignore it
+            current_state.add_text(char)
+        elif next_state is RegexState.End:
+            # This state just ended
             states.pop()
         else:
-            for next_re, result_state in current_state.lookup().items():
-                if next_re.match(text):
-                    # Start this new state
-                    child = result_state()
-                    current_state.add_child(child)
-                    text = text[1:]
-
-                    states.append(child)
-                    break
-            else:
-                # Useless char, ignore it
-                current_state.add_text(text[:1])
-                text = text[1:]
+            # Start this new state
+            child = next_state()
+            current_state.add_child(child)
+
+            states.append(child)
+
+        index += 1
 
     return top_state
 
 
+@functools.lru_cache(maxsize=256)
 def autocomplete_regex(text):
     ''' Tries to autocorrect user input (regex)
 
@@ -337,6 +504,10 @@ def autocomplete_regex(text):
     Best used when you want auto-updating search as the user types
         (so they can see their results as they type the group)
     '''
+    # Nothing is ever opened, so there's nothing to close
+    if '(' not in text and '[' not in text and '{' not in text:
+        return text
+
     parsed = _parse_completable_regex(text)
 
     # Now autocomplete
@@ -347,6 +518,13 @@ def autocomplete_regex(text):
 
 WORD_BOUNDARY_RE = re.compile(r'^a\b')
 
+# char => is_regex_word_boundary(char)
+#   ASCII is precomputed, anything else gets filled in as its seen
+WORD_BOUNDARY_CACHE = {
+    chr(code): WORD_BOUNDARY_RE.search('a' + chr(code)) is not None
+    for code in range(128)
+}
+
 
 def is_regex_word_boundary(char):
     ''' Returns whether this char breaks a word boundary
@@ -356,8 +534,10 @@ def is_regex_word_boundary(char):
     '!' will make \\b always fail == False
     'a' will let \\b work == True
     '''
-    match = WORD_BOUNDARY_RE.search('a' + char)
-    return match is not None
+    result = WORD_BOUNDARY_CACHE.get(char)
+    if result is None:
+        result = WORD_BOUNDARY_CACHE[char] = WORD_BOUNDARY_RE.search('a' + char) is not None
+    return result
 
 
 # -----------------------------------------------------------------------------
@@ -367,9 +547,13 @@ def is_regex_word_boundary(char):
 class ViewBaseStoreMeta(type):
     ''' Metaclass that uses creates a view Factory '''
 
+    # Every store made by this metaclass (so closed views can be cleaned up)
+    _STORES = weakref.WeakSet()
+
     def __init__(cls, name, bases, attrs, **kwargs):
         ''' Catches subclass creation, sets up the metaclass '''
         cls._ALL = {}
+        ViewBaseStoreMeta._STORES.add(cls)
 
         super().__init__(name, bases, attrs, **kwargs)
 
@@ -387,6 +571,24 @@ class ViewBaseStoreMeta(type):
 
         return obj
 
+    def existing(cls, view):
+        ''' Returns the view unique object, but only if it was already made (None otherwise) '''
+        return cls._ALL.get(view.id())
+
+    @staticmethod
+    def forget_view(view):
+        ''' Drops the stored objects of a view (e.g. once its closed) '''
+        view_id = view.id()
+        for store in list(ViewBaseStoreMeta._STORES):
+            store._ALL.pop(view_id, None)  # pylint: disable=protected-access
+
+
+class ViewStoreCleanupListener(sublime_plugin.EventListener):
+    ''' Stops the view stores holding on to closed views '''
+    def on_close(self, view):
+        ''' Event: a view was closed '''
+        ViewBaseStoreMeta.forget_view(view)
+
 
 # -----------------------------------------------------------------------------
 # Helper Commands
@@ -411,10 +613,18 @@ HIGHLIGHT_GROUP = 'Saevon-HighlightAllPlugin'
 
 HIGHLIGHT_GROUP_TEMP = HIGHLIGHT_GROUP + 'Temp'
 
+# Sublime search flags (case insensitive unless the regex has capitals)
+# Note: these are sublime's find flags, the `re` ones mean something else there
+SEARCH_FLAGS = 0
+SEARCH_FLAGS_IGNORECASE = sublime.IGNORECASE
+
 
 class Search(object):
     ''' Search, Highlight, and Goto for Sublime '''
 
+    # How many full searches to remember (while the file is unchanged)
+    RECENT_FINDS = 8
+
     def __init__(self, view, group_name, inverted=False):
         ''' Preps the search '''
         self.inverted = inverted
@@ -423,30 +633,86 @@ class Search(object):
         # Used to figure out the current search location
         self.__current = None
 
+        # The regexes the matches came from (so edited parts can be searched again)
+        self.patterns = []
+        # Regex of the last find() (None if it was limited to a selection)
+        self.last_pattern = None
+
         self.__view = view
 
+        # Copy of the matches in the view (valid until the file changes, since edits move them)
+        self.__matches = None
+        self.__matches_change_count = None
+
+        # Latest full searches [((regex, change count), matches)], so retyping a regex is free
+        self.__recent_finds = []
+
+        # Bumped whenever the matches are replaced (so an async refresh can tell it got overtaken)
+        self.__generation = 0
+
     def reset(self):
         ''' Clears the search (highlight + selected?)'''
 
         # Reset regions
         self.__view.erase_regions(self.__group_name)
+        self.patterns = []
+        self.__cache_matches([])
+        self.__generation += 1
 
     def current_matches(self):
         ''' Returns the current matches (saved) '''
-        # Load existing regions
-        regions = self.__view.get_regions(self.__group_name)
-        return regions
+        if self.__matches is None or self.__matches_change_count != self.__view.change_count():
+            # Load existing regions
+            self.__cache_matches(self.__view.get_regions(self.__group_name))
+
+        return list(self.__matches)
+
+    def __cache_matches(self, regions):
+        ''' Remembers the matches in the view (sorted, the same way sublime stores them) '''
+        self.__matches = sorted(regions, key=lambda region: (region.begin(), region.end()))
+        self.__matches_change_count = self.__view.change_count()
+
+        # Used to bisect to the matches near a point
+        self.__match_starts = [region.begin() for region in self.__matches]
+        self.__longest_match = max([region.size() for region in self.__matches] or [0])
+
+    def add_matches(self, regions, pattern=None):
+        ''' Appends the given regions to this search (as a jump + highlight point)
 
-    def add_matches(self, regions):
-        ''' Appends the given regions to this search (as a jump + highlight point) '''
+        pattern     The regex the regions came from (to keep them up to date as the file is edited)
+        '''
+        if pattern is not None and pattern not in self.patterns:
+            self.patterns.append(pattern)
+
+        # Searching again (e.g. "f" then "fo") finds a lot of the same matches, only keep one of each
+        seen = set()
+        matches = []
+        for region in itertools.chain(regions, self.current_matches()):
+            key = (region.begin(), region.end())
+            if key not in seen:
+                seen.add(key)
+                matches.append(region)
+
+        self.set_matches(matches)
+
+    def set_matches(self, regions, pattern=None):
+        ''' Replaces the matches of this search (no need to reset first)
 
+        pattern     The regex the regions came from (replacing any previous ones)
+        '''
+        if pattern is not None:
+            self.patterns = [pattern]
+
+        regions = list(regions)
+        self.__generation += 1
         self.__view.add_regions(
             self.__group_name,
-            regions + self.current_matches(),
+            regions,
             scope=HIGHLIGHT_SCOPE,
             icon='',
             flags=sublime.DRAW_NO_OUTLINE,
         )
+        self.__cache_matches(regions)
 
     def remove_matches(self, cursor, subtract=False):
         '''Removes the highligh under the cursor
@@ -456,90 +722,265 @@ class Search(object):
         If the cursor is selecting text, then just clears that part (potentially halving a selection)
         If the cursor is size 0 then clears any match it overlaps
         '''
+        self.remove_matches_bulk([(cursor, subtract)])
+
+    def remove_matches_bulk(self, cursors):
+        ''' remove_matches() for many cursors at once
+
+        cursors     List of (cursor, subtract) pairs
+
+        Sweeps the sorted matches and cursors together, only rewriting the matches once
+        Bisects to the matches near each cursor, the rest are kept as is
+        '''
+        cursors = sorted(cursors, key=lambda pair: pair[0].begin())
+        # (already sorted, along with their starts)
         matches = self.current_matches()
+        starts = self.__match_starts
+        longest = self.__longest_match
+
+        # The index ranges of matches a cursor could touch
+        # (anything starting more than the longest match before the cursor must end before it too)
+        nearby = merge_ranges(
+            (
+                bisect.bisect_left(starts, cursor.begin() - longest),
+                bisect.bisect_right(starts, cursor.end()),
+            )
+            for cursor, _subtract in cursors
+        )
+
         kept_matches = []
+        kept_until = 0
+        first_cursor = 0
+        changed = False
+        for start, end in nearby:
+            # Untouched matches
+            kept_matches += matches[kept_until:start]
+            kept_until = end
+
+            for match in matches[start:end]:
+                # Drop cursors that are done (the matches are sorted, the next ones start even later)
+                while first_cursor < len(cursors) and cursors[first_cursor][0].end() < match.begin():
+                    first_cursor += 1
+
+                # Cut the match with every cursor that can touch it (in order)
+                pieces = [match]
+                for cursor, subtract in itertools.islice(cursors, first_cursor, None):
+                    if cursor.begin() > match.end():
+                        break
+
+                    pieces = [
+                        piece
+                        for old_piece in pieces
+                        for piece in self._cut_match(old_piece, cursor, subtract)
+                    ]
 
-        for match in matches:
-            if cursor.contains(match):
-                # Any engulfed matches are always gone
-                continue
-            if not cursor.intersects(match):
-                # auto-keep ones which don't overlap
+                if len(pieces) != 1 or pieces[0] is not match:
+                    changed = True
+                kept_matches += pieces
+
+        if not changed:
+            return
+
+        kept_matches += matches[kept_until:]
+
+        # The patterns would find the cleared matches again on the next edit, stop following them
+        self.patterns = []
+
+        # Replace the current set of matches
+        self.set_matches(kept_matches)
+
+    @staticmethod
+    def _cut_match(match, cursor, subtract):
+        ''' Returns what's left of the match once the cursor is removed from it '''
+        if cursor.contains(match):
+            # Any engulfed matches are always gone
+            return []
+        if not cursor.intersects(match):
+            # auto-keep ones which don't overlap
+            return [match]
+
+        if not subtract:
+            # Reset Mode means the entire match is cleared
+            # (Default if we don't use subtract mode)
+
+            if match.contains(cursor):
+                # Discard the match under the cursor
+                return []
+            return [match]
+
+        # Subtract Mode means we cut partial matches into pieces
+
+        # Case 1: Cursor is engulfed... Split the match into 2
+        if cursor.begin() >= match.begin() and cursor.end() <= match.end():
+            return [
+                sublime.Region(match.begin(), cursor.begin()),
+                sublime.Region(cursor.end(), match.end()),
+            ]
+        # Case 2: Cursor is before (and slightly overlapping the match)
+        elif cursor.begin() < match.begin():
+            return [sublime.Region(
+                cursor.end(),
+                match.end(),
+            )]
+        # Case 2: Cursor is after (but slightly overlapping the match)
+        elif cursor.end() > match.end():
+            return [sublime.Region(
+                match.begin(),
+                cursor.begin(),
+            )]
+
+        return []
+
+    @staticmethod
+    def _flags(regex):
+        ''' Returns the search flags for the regex '''
+        # Ignore case unless there are capitals
+        if has_capitals(regex):
+            return SEARCH_FLAGS
+        return SEARCH_FLAGS_IGNORECASE
+
+    def refresh(self, zones):
+        ''' Searches the given zones again (e.g. after that part of the file was edited)
+
+        zones       Regions to update (Matches touching them get replaced)
+
+        Only the saved patterns are used, the rest of the file is left alone
+        Safe to run off the UI thread, the result is only applied back on it
+        '''
+        # Anything changing the search (or the file) meanwhile means this refresh is out of date
+        generation = self.__generation
+        change_count = self.__view.change_count()
+
+        patterns = list(self.patterns)
+        if not patterns or not zones:
+            return
+
+        zones = merge_regions(zones)
+        zone_starts = [zone.begin() for zone in zones]
+
+        # Drop the matches touching a zone
+        # (and widen the zone over them, so multi-line matches get found again in full)
+        kept_matches = []
+        old_matches = set()
+        for match in self.current_matches():
+            # Zones are sorted and apart, only the last one starting before the match can reach it
+            index = bisect.bisect_right(zone_starts, match.end()) - 1
+            if index < 0 or zones[index].end() < match.begin():
                 kept_matches.append(match)
                 continue
 
-            if not subtract:
-                # Reset Mode means the entire match is cleared
-                # (Default if we don't use subtract mode)
+            zones.append(match)
+            old_matches.add((match.begin(), match.end()))
 
-                if match.contains(cursor):
-                    # Discard the match under the cursor
-                    continue
-                kept_matches.append(match)
-            else:
-                # Subtract Mode means we cut partial matches into pieces
+        zones = merge_regions(zones)
 
-                # Case 1: Cursor is engulfed... Split the match into 2
-                if cursor.begin() >= match.begin() and cursor.end() <= match.end():
-                    kept_matches += [
-                        sublime.Region(match.begin(), cursor.begin()),
-                        sublime.Region(cursor.end(), match.end()),
-                    ]
-                    continue
-                # Case 2: Cursor is before (and slightly overlapping the match)
-                elif cursor.begin() < match.begin():
-                    kept_matches.append(sublime.Region(
-                        cursor.end(),
-                        match.end(),
-                    ))
-                # Case 2: Cursor is after (but slightly overlapping the match)
-                elif cursor.end() > match.end():
-                    kept_matches.append(sublime.Region(
-                        match.begin(),
-                        cursor.begin(),
-                    ))
+        new_matches = []
+        found = set()
+        for pattern in patterns:
+            for match in self._find_in_zones(pattern, zones):
+                # (several patterns can find the same match)
+                key = (match.begin(), match.end())
+                if key not in found:
+                    found.add(key)
+                    new_matches.append(match)
 
-        # Replace the current set of matches
-        self.reset()
-        self.add_matches(kept_matches)
+        if found == old_matches:
+            # The edit didn't change what matches there, no need to redraw
+            return
+
+        # The commands change the search on the UI thread, so check (and replace) it there
+        sublime.set_timeout(
+            lambda: self._apply_refresh(kept_matches + new_matches, generation, change_count),
+            0,
+        )
+
+    def _apply_refresh(self, matches, generation, change_count):
+        ''' Saves the refreshed matches, unless the search or the file changed since refresh() read them '''
+        if generation != self.__generation:
+            # Reset, replaced or cleared meanwhile (don't bring the old matches back)
+            return
+        if change_count != self.__view.change_count():
+            # Edited again meanwhile, these positions are already stale (the next refresh redoes it)
+            return
+
+        self.set_matches(matches)
+
+    def _find_in_zones(self, regex, zones):
+        ''' Finds the (non empty) matches that start within the zones (sorted, and apart)
+
+        Uses the view's own search, so the matches are the same as the ones find_all() gives
+        view.find() can't be told where to stop, so the match found past one zone is kept for the next ones
+        (at most one search per call runs on to the end of the file)
+        '''
+        flags = self._flags(regex)
+
+        matches = []
+        match = None
+        for zone in zones:
+            point = zone.begin()
+            while True:
+                if match is None or match.begin() < point:
+                    match = self.__view.find(regex, point, flags)
+                    if match is None or match.begin() == -1 or match.begin() < point:
+                        # Nothing left in the file (stepping past an empty match at the end can't go any further)
+                        return matches
+
+                if match.begin() > zone.end():
+                    # Past this zone (but maybe in the next one)
+                    break
+
+                if match.empty():
+                    # Empty matches are never kept, just step over them
+                    point = match.end() + 1
+                else:
+                    matches.append(match)
+                    point = match.end()
+                match = None
+
+        return matches
 
     def _find_matches(self, regex, search_zone=None):
         '''
         Finds matches within the view
 
-        search_zone     The zone to limit the search to (optional)
+        search_zone     The zones (list of regions) to limit the search to (optional)
         '''
-        # Regex Flags
-        flags = 0
-        flags |= re.DOTALL
+        # Only a full search can be repeated later
+        self.last_pattern = None if search_zone else regex
 
-        # Ignore case unless there are capitals
-        match = CAPS_RE.search(regex)
-        if match is None:
-            flags |= re.IGNORECASE
-
-        matched_regions = self.__view.find_all(regex, flags)
+        if not search_zone:
+            key = (regex, self.__view.change_count())
+            for recent_key, recent_matches in self.__recent_finds:
+                if recent_key == key:
+                    return list(recent_matches)
 
-        # Filter out empty matches
-        matched_regions = list(filter(lambda region: region.end() != region.begin(), matched_regions))
+        flags = self._flags(regex)
 
+        # Filter out empty matches in the same pass
         # If the user wants to limit it to the current selection... we only search within there
-        if search_zone:
-            # Filter out things that aren't in the given zone
-            matched_regions = [region for region in matched_regions if search_zone.contains(region)]
+        # (the zone is a list of selections, the match has to be within one of them)
+        matched_regions = [
+            region
+            for region in self.__view.find_all(regex, flags)
+            if region.a != region.b
+            and (not search_zone or any(zone.contains(region) for zone in search_zone))
+        ]
+
+        if not search_zone:
+            # Any edit moves the matches, so only keep the searches of this version of the file
+            self.__recent_finds = [
+                recent
+                for recent in self.__recent_finds[1 - self.RECENT_FINDS:]
+                if recent[0][1] == key[1]
+            ]
+            self.__recent_finds.append((key, matched_regions))
+            return list(matched_regions)
 
         return matched_regions
 
     def find_words(self, words, in_selection=False, word_boundary=True):
         ''' Finds the given words'''
-        boundary_char = r'\b' if word_boundary else ''
-
-        word_regex = [re.escape(word) for word in words]
-
-        regex = '{boundary_char}({word}){boundary_char}'.format(
-            word='|'.join(word_regex),
-            boundary_char=boundary_char,
-        )
+        regex = words_regex(tuple(words), word_boundary)
 
         return self.find(regex, in_selection=in_selection)
 
@@ -602,10 +1043,13 @@ class Search(object):
         if viewport is None:
             viewport = self.__view.visible_region()
 
+        # Snapshot the selection once, the generator works off the copy
+        selection = self.__view.sel()
+
         # Warning! this is a generator, it won't run the code until the for loop (later)
         #   is finished... don't mutate any of its state/args
         new_cursor_gen = cursor_to_matches(
-            cursors=list(self.__view.sel()),
+            cursors=list(selection),
             matches=current_matches,
             inverted=inverted,
             viewport=viewport,
@@ -637,13 +1081,12 @@ class Search(object):
                 ))
             else:
                 # Otherwise the cursors are just jumping
-                new_cursors.append(sublime.Region(cursor.begin(), cursor.begin()))
+                new_cursors.append(sublime.Region(cursor.begin()))
 
         if update_cursors:
             # Now swap the cursors to the new ones
-            self.__view.sel().clear()
-            for cursor in new_cursors:
-                self.__view.sel().add(cursor)
+            selection.clear()
+            selection.add_all(new_cursors)
 
         # Show the result of the jump
         if new_visible is not None:
@@ -700,10 +1143,21 @@ class HighlightSelectionCommand(sublime_plugin.TextCommand):
             # Nothing to find...
             return
 
-        selected_chunks = []
+        # (pre_boundary, post_boundary) => selected text
+        #   Texts with the same boundaries share one trie, so common prefixes are only matched once
+        boundary_groups = {}
+        group_order = []
+        seen_text = set()
         for cursor in cursors:
             text = self.view.substr(cursor)
-            escaped = re.escape(text)
+
+            # Multiple cursors often select the same word, only search for it once
+            # (and an empty selection would only ever find empty matches)
+            if not text or text in seen_text:
+                continue
+            seen_text.add(text)
+
+            pre_boundary = post_boundary = ''
 
             # See if we want to do a 'word-based' search
             if auto_boundary:
@@ -711,13 +1165,24 @@ class HighlightSelectionCommand(sublime_plugin.TextCommand):
                 pre_boundary = r'\b' if not is_regex_word_boundary(text[0]) else ''
                 post_boundary = r'\b' if not is_regex_word_boundary(text[-1]) else ''
 
-                escaped = '{pre_boundary}{word}{post_boundary}'.format(
-                    word=re.escape(text),
-                    pre_boundary=pre_boundary,
-                    post_boundary=post_boundary,
-                )
+            boundaries = (pre_boundary, post_boundary)
+            if boundaries not in boundary_groups:
+                boundary_groups[boundaries] = []
+                group_order.append(boundaries)
+            boundary_groups[boundaries].append(text)
 
-            selected_chunks.append(escaped)
+        if not group_order:
+            # Nothing to find...
+            return
+
+        selected_chunks = [
+            '{pre_boundary}{words}{post_boundary}'.format(
+                words=trie_regex(boundary_groups[boundaries]),
+                pre_boundary=boundaries[0],
+                post_boundary=boundaries[1],
+            )
+            for boundaries in group_order
+        ]
 
         regex = '|'.join(selected_chunks)
 
@@ -727,7 +1192,7 @@ class HighlightSelectionCommand(sublime_plugin.TextCommand):
             in_selection=False,
         )
 
-        search.add_matches(matches)
+        search.add_matches(matches, pattern=search.last_pattern)
 
 
 class HighlightWordCommand(sublime_plugin.TextCommand):
@@ -750,16 +1215,22 @@ class HighlightWordCommand(sublime_plugin.TextCommand):
             return
 
         words = []
+        seen_regions = set()
         for cursor in cursors:
             word_region = self.view.word(cursor)
-            word = self.view.substr(word_region)
-            words.append(word)
+
+            # Cursors within the same word only need it read once
+            if (word_region.a, word_region.b) in seen_regions:
+                continue
+            seen_regions.add((word_region.a, word_region.b))
+
+            words.append(self.view.substr(word_region))
 
         # Find the words
         matches = search.find_words(words, word_boundary=word_boundary)
 
         # Highlight these regions
-        search.add_matches(matches)
+        search.add_matches(matches, pattern=search.last_pattern)
 
 
 class ClearAllHighlightCommand(sublime_plugin.TextCommand):
@@ -783,9 +1254,8 @@ class ClearHighlightCommand(sublime_plugin.TextCommand):
         ''' Runs the command '''
         search = ViewSearch(self.view)
 
-        cursors = list(self.view.sel())
-
-        for cursor in cursors:
+        removals = []
+        for cursor in self.view.sel():
             subtract_mode = True
             if cursor.size() == 0:
                 subtract_mode = False
@@ -793,7 +1263,10 @@ class ClearHighlightCommand(sublime_plugin.TextCommand):
                 # or else its hard to remove 1 char matches
                 cursor = sublime.Region(cursor.begin(), cursor.begin() + 1)
 
-            search.remove_matches(cursor, subtract=subtract_mode)
+            removals.append((cursor, subtract_mode))
+
+        # All the cursors in one go
+        search.remove_matches_bulk(removals)
 
 
 class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
@@ -814,24 +1287,63 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
     autoupdate:  shows realtime search preview
     '''
 
+    # How long typing has to pause before the preview searches (ms)
+    CHANGE_DELAY = 40
+    # Partial regexes that match (nearly) everywhere, not worth previewing
+    DEGENERATE_TEXTS = frozenset(['.', '^', '$', '|', '(', '[', '\\'])
+
     def _on_change(self, text):
         ''' Event: User typing '''
         # Ignore typing if we aren't autoupdating
-        if self.search is None:
+        if not self.autoupdate:
             return
 
+        # Wait for a pause in the typing, only the latest text gets searched
+        self.change_token += 1
+        token = self.change_token
+        sublime.set_timeout(lambda: self._preview(text, token), self.CHANGE_DELAY)
+
+    def _preview(self, text, token):
+        ''' Shows the live search preview '''
+        # Newer typing (or the panel closing) has replaced this one
+        if token != self.change_token:
+            return
+
+        # Don't flood the view with a match (or empty match) for every character
+        if text in self.DEGENERATE_TEXTS:
+            if self.search is not None:
+                self.search.set_matches([])
+            self.last_search = None
+            return
+
+        # The temporary search is only made once there is something to find
+        if self.search is None:
+            if not text:
+                return
+
+            self.search = Search(
+                view=self.view,
+                # Create a temporary group so we can add it to the full search if needed
+                group_name=HIGHLIGHT_GROUP_TEMP,
+                inverted=self.backwards,
+            )
+
         # Reset the original view
         # So the search will center consistently
-        self.view.set_viewport_position(self.viewport)
+        if self.viewport_moved:
+            self.view.set_viewport_position(self.viewport)
 
-        # Clear temporary searches
-        self.search.reset()
+        # Now perform the new search (replacing the temporary one)
+        matches = self._narrow_matches(text)
+        if matches is None:
+            matches = self.search.find(text, self.autocorrect)
+        self.search.set_matches(matches)
 
-        # Now perform the new search
-        matches = self.search.find(text, self.autocorrect)
-        self.search.add_matches(matches)
+        # Remember it, so the next keystroke can build on it
+        self.last_search = (text, self.view.change_count(), matches)
 
         # Jump to the found data
+        self.viewport_moved = True
         relevant_matches = self.search.forwards(
             update_cursors=False,
             viewport=self.visible_region,
@@ -841,11 +1353,52 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
         # Now reset it just to the useful ones
         #   showing where the cursor will jump to
         if self.jump_only:
-            self.search.reset()
-            self.search.add_matches(relevant_matches)
+            self.search.set_matches(relevant_matches)
+
+    def _narrow_matches(self, text):
+        ''' Re-uses the last keystroke's matches when the user just typed more text
+
+        Returns None when the view has to be searched again
+
+        Only safe for plain text (no regex) which can't overlap itself
+        then every match of the longer text starts at a match of the shorter one
+        (and none of the kept matches can overlap each other)
+        '''
+        if self.last_search is None:
+            return None
+
+        last_text, change_count, last_matches = self.last_search
+        if (
+                not last_text
+                or not text.startswith(last_text)
+                or change_count != self.view.change_count()
+                or not LITERAL_SEARCH_RE.match(text)
+                or has_border(last_text)
+                or has_border(text)
+        ):
+            return None
+
+        # Same case rules as Search._find_matches()
+        ignore_case = not has_capitals(text)
+        if ignore_case:
+            text = text.lower()
+
+        matches = []
+        for match in last_matches:
+            region = sublime.Region(match.begin(), match.begin() + len(text))
+            found = self.view.substr(region)
+            if ignore_case:
+                found = found.lower()
+
+            if found == text:
+                matches.append(region)
+
+        return matches
 
     def _on_done(self, text):
         ''' Event: user Input'''
+        # Drop any preview still waiting to run
+        self.change_token += 1
 
         # Clean up the temporary search
         if self.search:
@@ -857,14 +1410,24 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
             inverted=self.backwards,
         )
 
-        matches = search.find(text, autocorrect=self.autocorrect)
-
-        # Reset the search if we want a clean one
-        if not self.append:
-            search.reset()
+        # The preview likely already found these (as long as the file hasn't changed since)
+        if (
+                self.last_search is not None
+                and self.last_search[0] == text
+                and self.last_search[1] == self.view.change_count()
+        ):
+            matches = self.last_search[2]
+            pattern = autocomplete_regex(text) if self.autocorrect else text
+        else:
+            matches = search.find(text, autocorrect=self.autocorrect)
+            pattern = search.last_pattern
 
         # Show the items we found
-        search.add_matches(matches)
+        # (A clean search just replaces the old matches, no need to reset them first)
+        if self.append:
+            search.add_matches(matches, pattern=pattern)
+        else:
+            search.set_matches(matches, pattern=pattern)
 
         # Jump to the found data
         # Note: use the saved visible region, since our temporary search moves the viewport around
@@ -876,6 +1439,8 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
 
     def _on_cancel(self):
         ''' Event: user abort'''
+        # Drop any preview still waiting to run
+        self.change_token += 1
 
         # Without the temporary search this doesn't change state
         # No need to reset
@@ -885,8 +1450,12 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
         # Reset the temporary search
         self.search.reset()
 
-        # Reset the original view
-        self.view.set_viewport_position(self.viewport)
+        # Reset the original view (unless the preview never moved it)
+        if self.viewport_moved:
+            self.view.set_viewport_position(self.viewport)
+
+    # Input menu symbol for (forwards, backwards)
+    DIRECTION_KEYS = ('>>', '<<')
 
     # pylint: disable=too-few-public-methods,unused-argument, too-many-arguments
     def run(self, edit=None, backwards=False, autoupdate=True, autocorrect=True, append=True, jump_only=False):
@@ -895,7 +1464,7 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
         # pylint: disable=attribute-defined-outside-init
 
         # This defines the input menu symbol, showing the direction
-        direction_key = '<<' if backwards else '>>'
+        direction_key = self.DIRECTION_KEYS[bool(backwards)]
         if not jump_only:
             direction_key = 'Highlight ' + direction_key
 
@@ -907,18 +1476,20 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
         self.was_multi = sublime_is_multiselect(self.view)
         self.jump_only = jump_only or self.was_visual or self.was_multi
 
-        # Store the original state
-        self.viewport = self.view.viewport_position()
-        self.visible_region = self.view.visible_region()
-
+        self.last_search = None
         self.search = None
+        self.viewport_moved = False
+        self.change_token = 0
+
+        # Only the live preview moves the viewport, so that's the only time to store the original state
+        # (Otherwise forwards() just uses the current visible region)
+        self.viewport = None
+        self.visible_region = None
+
+        self.autoupdate = autoupdate
         if autoupdate:
-            self.search = Search(
-                view=self.view,
-                # Create a temporary group so we can add it to the full search if needed
-                group_name=HIGHLIGHT_GROUP_TEMP,
-                inverted=backwards,
-            )
+            self.viewport = self.view.viewport_position()
+            self.visible_region = self.view.visible_region()
 
         self.open_panel(
             name='vimSearchPanel',
@@ -927,16 +1498,52 @@ class HighlightPanelCommand(sublime_plugin.TextCommand, InputPanelMixin):
         )
 
 
-# TODO: Catch modifications to re-search? (live_update=True)
-# class HighlightListener(sublime_plugin.EventListener):
+class HighlightListener(sublime_plugin.EventListener):
+    ''' Keeps the highlights up to date as the file is edited
 
-#     def on_modified(self, view):
-#         view.run_command('highlight_all', args={
-#             'runPrevious': True,
-#         })
+    Only the lines under the cursors (where the edits happen) and the visible region are searched again
+    '''
+
+    # pylint: disable=no-self-use
+    def on_modified_async(self, view):
+        ''' Event: the file was edited (searched off the UI thread) '''
+        search = ViewSearch.existing(view)
+        if search is None or not search.patterns:
+            return
+
+        zones = [view.line(cursor) for cursor in view.sel()]
+        zones.append(view.visible_region())
+
+        search.refresh(zones)
+
+
+DIGITS = '0123456789'
 
+# Ex mode search character => whether its backwards
+SEARCH_DIRECTIONS = {
+    '/': False,
+    '?': True,
+}
 
-LINE_RE = re.compile(r'(?P<row>[0-9]+)(:(?P<col>[0-9]+))?')
+
+def parse_line_jump(text):
+    ''' Parses the ':row:column' ex command
+
+    Same as matching `[0-9]+(:[0-9]+)?` at the start of the text
+    Returns (row, col) as typed (col is None if it wasn't given), or None if the text isn't a jump
+    '''
+    rest = text.lstrip(DIGITS)
+    if len(rest) == len(text):
+        return None
+    row = int(text[:len(text) - len(rest)])
+
+    col = None
+    if rest.startswith(':'):
+        col_rest = rest[1:].lstrip(DIGITS)
+        if len(col_rest) < len(rest) - 1:
+            col = int(rest[1:len(rest) - len(col_rest)])
+
+    return row, col
 
 
 class ExModeCommand(sublime_plugin.TextCommand, InputPanelMixin):
@@ -946,61 +1553,75 @@ class ExModeCommand(sublime_plugin.TextCommand, InputPanelMixin):
         ''' Event: User Input '''
 
         # ':row:column' command
-        match = LINE_RE.match(text)
-        if match:
-            col = match.group('col')
+        jump = parse_line_jump(text)
+        if jump:
+            row, col = jump
             if col is None:
                 col = 0
             else:
-                col = int(col) - 1
+                col = col - 1
             # cursors in sublime are zero based, but line numbers are 1 based
-            line_num = int(match.group('row')) - 1
+            line_num = row - 1
 
             cursor = self.view.text_point(line_num, 0)
 
             # set the Column
-            line = self.view.line(cursor)
+            line_end = self.view.line(cursor).end()
             cursor = cursor + col
-            if cursor > line.end():
+            if cursor > line_end:
                 # Vintage mode needs this -1 or else it would be past the end
-                cursor = line.end() - 1
+                cursor = line_end - 1
 
-            self.view.sel().clear()
-            self.view.sel().add(sublime.Region(cursor))
+            selection = self.view.sel()
+            selection.clear()
+            selection.add(sublime.Region(cursor))
 
             self.view.show_at_center(cursor)
 
             return None
 
-        while len(text):
-            char, text = text[0], text[1:]
-
-            if char == "w" and self.view.is_dirty():
-                self.view.run_command('save')
-            elif char == "q":
-                self.view.window().run_command('close')
-            elif char == "?":
+        # Only the search commands need the rest of the text, so that's the only slice
+        for index, char in enumerate(text):
+            handler = self.EX_COMMANDS.get(char)
+            if handler is not None:
+                handler(self)
+            elif char in SEARCH_DIRECTIONS:
+                # '/' searches forwards, '?' backwards
                 return self.view.run_command(
                     'highlight_all',
                     args={
-                        "backwards": True,
-                        "regex": text,
-                    }
-                )
-            elif char == "/":
-                return self.view.run_command(
-                    'highlight_all',
-                    args={
-                        "regex": text,
+                        "backwards": SEARCH_DIRECTIONS[char],
+                        "regex": text[index + 1:],
                     }
                 )
 
+        return None
+
+    def _write(self):
+        ''' Ex Command: saves the file (if there is anything to save) '''
+        if self.view.is_dirty():
+            self.view.run_command('save')
+
+    def _quit(self):
+        ''' Ex Command: closes the file '''
+        self.window.run_command('close')
+
+    # Single character commands => their handler
+    EX_COMMANDS = {
+        'w': _write,
+        'q': _quit,
+    }
+
     # pylint: disable=too-few-public-methods,unused-argument
     def run(self, edit=None):
         ''' The actual command for sublime to run '''
+        # pylint: disable=attribute-defined-outside-init
+        # The panel belongs to this window, keep it for the commands too
+        self.window = self.view.window()
+
         self.open_panel(
             name='vimExPanel',
-            window=self.view.window(),
+            window=self.window,
             prompt=':',
         )
 
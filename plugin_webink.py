@@ -27,7 +27,8 @@ HYPERLINK_RE = (
         r'(?:https?)'
         r'://'
         # The entire URL ending
-        r'\S*'
+        # (capped, so minified/base64 lines can't make a single match run across the whole line)
+        r'\S{0,2048}'
     ) + r')'
 )
 MD_HYPERLINK_RE = (
@@ -37,6 +38,20 @@ MD_HYPERLINK_RE = (
         r'\)'
     ) + r')'
 )
+# Either kind of link (the url is group 1 for markdown links, group 2 otherwise)
+LINK_RE = MD_HYPERLINK_RE + r'|' + HYPERLINK_RE
+
+# Compiled once (the strings above are still needed for `view.find_all`)
+HYPERLINK_PATTERN = re.compile(HYPERLINK_RE)
+MD_HYPERLINK_PATTERN = re.compile(MD_HYPERLINK_RE)
+LINK_PATTERN = re.compile(LINK_RE)
+
+# The clickable icon after each link (only the link itself changes)
+LINK_ICON_HTML = (
+    '<span class="label label-success"><a href="{link}">'
+    + html.escape('↪')
+    + '</a></span>'
+)
 
 
 class OpenHyperLinkCommand(sublime_plugin.TextCommand):
@@ -66,12 +81,10 @@ class OpenHyperLinkCommand(sublime_plugin.TextCommand):
         ''' Finds the link exactly selected by the cursor '''
         word = self.view.substr(cursor)
 
-        match = re.match(MD_HYPERLINK_RE, word)
-        if not match:
-            match = re.match(HYPERLINK_RE, word)
-
+        # (markdown links are tried first)
+        match = LINK_PATTERN.match(word)
         if match:
-            return match.group(1)
+            return match.group(1) or match.group(2)
 
         return None
 
@@ -82,8 +95,8 @@ class OpenHyperLinkCommand(sublime_plugin.TextCommand):
 
         # Find all links in the selection
         links = itertools.chain(
-            re.finditer(MD_HYPERLINK_RE, line),
-            re.finditer(HYPERLINK_RE, line),
+            MD_HYPERLINK_PATTERN.finditer(line),
+            HYPERLINK_PATTERN.finditer(line),
         )
 
         for link in links:
@@ -98,11 +111,28 @@ class OpenHyperLinkCommand(sublime_plugin.TextCommand):
 class HyperLinkAnnotator(sublime_plugin.ViewEventListener):
     ''' Adds clickable hyperlinks '''
 
+    def __init__(self, view):
+        super().__init__(view)
+
+        # Only the phantoms that changed get re-drawn (so the others don't flicker)
+        self.phantoms = sublime.PhantomSet(view, 'saevon-weblink-icon')
+        # The file version the links were found in
+        self.change_count = None
+
     def render(self, view):
         ''' Adds all links '''
-        links = view.find_all(MD_HYPERLINK_RE + r"|" + HYPERLINK_RE)
-        for link in links:
-            self.render_link(view, link)
+        self.change_count = view.change_count()
+
+        # Most files don't have any links, a literal scan is enough to tell
+        # (every link has to contain its schema)
+        first = view.find('http', 0, sublime.LITERAL)
+        links = []
+        urls = []
+        if first is not None and first.begin() != -1:
+            # Sublime fills in each link's url as it finds them (no need to re-read and re-match them)
+            links = view.find_all(LINK_RE, 0, '$1$2', urls)
+
+        self.phantoms.update([self.link_phantom(link, url) for link, url in zip(links, urls)])
 
         # Also add the underline
         # current = view.get_regions('saevon-weblink')
@@ -116,23 +146,10 @@ class HyperLinkAnnotator(sublime_plugin.ViewEventListener):
         ''' Adds all links '''
         webbrowser.open_new_tab(url)
 
-    def render_link(self, view, region):
-        ''' Adds all links '''
-        text = view.substr(region)
-        match = re.match(MD_HYPERLINK_RE, text)
-        if not match:
-            match = re.match(HYPERLINK_RE, text)
-
-        url = match.group(1)
-
-        content = """
-            <span class="label label-success"><a href="{link}">{content}</a></span>
-        """.format(
-            link=html.escape(url),
-            content=html.escape('↪'),
-        )
-        view.add_phantom(
-            'saevon-weblink-icon',
+    def link_phantom(self, region, url):
+        ''' Returns the link icon for the given link '''
+        content = LINK_ICON_HTML.format(link=html.escape(url))
+        return sublime.Phantom(
             sublime.Region(region.end(), region.end()),
             content,
             sublime.LAYOUT_INLINE,
@@ -145,7 +162,9 @@ class HyperLinkAnnotator(sublime_plugin.ViewEventListener):
 
     def on_modified_async(self):
         ''' On page edit '''
-        self.view.erase_phantoms('saevon-weblink-icon')
-        self.view.erase_regions('saevon-weblink')
+        # Already up to date (e.g. several edits were handled at once)
+        if self.change_count == self.view.change_count():
+            return
 
+        # (add_regions replaces the old underlines, and the phantom set the old icons)
         self.render(self.view)
@@ -3,6 +3,7 @@
 #
 # Shows all the vi marks that exist
 #
+import functools
 import os
 import re
 
@@ -33,12 +34,35 @@ def all_syntax_files(package, syntax):
         )
 
 
+@functools.lru_cache(maxsize=128)
+def find_syntax_file(package, syntax):
+    ''' Returns the first syntax file that exists (None otherwise)
+
+    Cached, since this runs on every load/save and installed syntaxes rarely change
+    (restart sublime after installing one)
+    '''
+    for syntax_file in all_syntax_files(package, syntax):
+        if os.path.exists(os.path.join(sublime.packages_path(), syntax_file)):
+            return syntax_file
+    return None
+
+
+SHEBANG_RE = re.compile(r"#\s*!\s*(?P<path>[^\s]+(\\|/))?(?P<cmd>[^\s/\\]+)\s*(?P<arg>[^\s]+)?")
+
+
 class ShebangSyntaxCommand(sublime_plugin.TextCommand):
+    # One group per special command, so a single match picks the syntax
+    COMMAND_RE = re.compile(
+        r'(?P<python>python(?:[23]\.[0-9]+)?)'
+        r'|(?P<perl>perl)'
+        r'|(?P<shell>bash|sh)'
+        r'|(?P<haskell>ghc|haskell)'
+    )
     MAPPING = {
-        re.compile(r'python([23]\.[0-9]+)?'): 'Python',
-        re.compile(r'perl'): 'ModernPerl',
-        re.compile(r'(bash|sh)'): ('ShellScript', "Shell-Unix-Generic"),
-        re.compile(r'(ghc|haskell)'): 'Haskell',
+        'python': 'Python',
+        'perl': 'ModernPerl',
+        'shell': ('ShellScript', "Shell-Unix-Generic"),
+        'haskell': 'Haskell',
     }
 
 
@@ -47,11 +71,16 @@ class ShebangSyntaxCommand(sublime_plugin.TextCommand):
         # if not os.path.basename(self.view.file_name()).find('.'):
         #     return
 
+        # Most files don't start with a shebang, so check the first character before reading the line
+        # (only the "#" is certain, the shebang allows spaces before the "!")
+        if self.view.substr(0) != '#':
+            return
+
         # Grab the first line's contents
         first_line = self.view.substr(self.view.full_line(1))
 
         # Get the shebang components
-        match = re.match(r"#\s*!\s*(?P<path>[^\s]+(\\|/))?(?P<cmd>[^\s/\\]+)\s*(?P<arg>[^\s]+)?", first_line)
+        match = SHEBANG_RE.match(first_line)
         if not match:
             # We only run on things which have a shebang
             return
@@ -66,10 +95,9 @@ class ShebangSyntaxCommand(sublime_plugin.TextCommand):
         # settings = sublime.load_settings('Shebang.sublime-settings')
         # mapping = settings.get('language_mapping')
         # mapping.get(' ')
-        for regex, syntax in self.MAPPING.items():
-            match = regex.match(command)
-            if match:
-                break
+        match = self.COMMAND_RE.match(command)
+        if match:
+            syntax = self.MAPPING[match.lastgroup]
         else:
             # If its not special, try to find it as is
             syntax = command
@@ -86,10 +114,8 @@ class ShebangSyntaxCommand(sublime_plugin.TextCommand):
             # If its a single value, its assumed the package is the same as the syntax
             package = syntax
 
-        for syntax_file in all_syntax_files(package, syntax):
-            if os.path.exists(os.path.join(sublime.packages_path(), syntax_file)):
-                break
-        else:
+        syntax_file = find_syntax_file(package, syntax)
+        if syntax_file is None:
             # Syntax doesn't exist...
             return
 
@@ -1,6 +1,8 @@
 '''
 Helper functions for working with sublime
 '''
+import weakref
+
 import sublime
 import sublime_plugin
 
@@ -40,8 +42,12 @@ class MetaWindowFactory(type):
         self.window is always assigned
     '''
 
+    # Every class made by this factory (so closed windows can be cleaned up)
+    _FACTORIES = weakref.WeakSet()
+
     def __init__(cls, name, bases, attrs, **kwargs):
         cls._instances = {}
+        MetaWindowFactory._FACTORIES.add(cls)
         super().__init__(name, bases, attrs, **kwargs)
 
     def __call__(cls, *args, **kwargs):
@@ -52,7 +58,7 @@ class MetaWindowFactory(type):
             window = view.window()
 
         factory_id = window.id()
-        self = cls._instances.get(factory_id, None)
+        self = cls._instances.get(factory_id)
         if self is None:
             self = cls.__new__(cls, *args, **kwargs)
             self.window = window
@@ -63,6 +69,24 @@ class MetaWindowFactory(type):
         return self
 
 
+def forget_window(window):
+    ''' Drops the singletons of a window (e.g. once its closed) '''
+    window_id = window.id()
+    for factory in list(MetaWindowFactory._FACTORIES):  # pylint: disable=protected-access
+        factory._instances.pop(window_id, None)  # pylint: disable=protected-access
+
+
+class FactoryCleanupListener(sublime_plugin.EventListener):
+    ''' Stops the factories holding on to closed windows and views '''
+    def on_pre_close_window(self, window):
+        ''' Event: a window is closing '''
+        forget_window(window)
+
+    def on_close(self, view):
+        ''' Event: a view was closed '''
+        forget_view(view)
+
+
 class MetaViewFactory(type):
     '''
     Factory: Singleton per view
@@ -72,8 +96,12 @@ class MetaViewFactory(type):
         self.view is always assigned
     '''
 
+    # Every class made by this factory (so closed views can be cleaned up)
+    _FACTORIES = weakref.WeakSet()
+
     def __init__(cls, name, bases, attrs, **kwargs):
         cls._instances = {}
+        MetaViewFactory._FACTORIES.add(cls)
 
         super().__init__(name, bases, attrs, **kwargs)
 
@@ -81,7 +109,7 @@ class MetaViewFactory(type):
         view = kwargs.pop('view', None)
 
         factory_id = view.id()
-        self = cls._instances.get(factory_id, None)
+        self = cls._instances.get(factory_id)
         if self is None:
             self = cls.__new__(cls, *args, **kwargs)
             self.view = view
@@ -89,11 +117,16 @@ class MetaViewFactory(type):
 
             cls._instances[factory_id] = self
 
-            self.view = view
-
         return self
 
 
+def forget_view(view):
+    ''' Drops the singletons of a view (e.g. once its closed) '''
+    view_id = view.id()
+    for factory in list(MetaViewFactory._FACTORIES):  # pylint: disable=protected-access
+        factory._instances.pop(view_id, None)  # pylint: disable=protected-access
+
+
 class Viewport():
     ''' Saved viewport in a specific view '''
     def __init__(self, view):
@@ -204,15 +237,15 @@ def cursor_to_matches(*, cursors, matches, viewport, inverted=False, find_visibl
         # There is no such thing as 'next'
         return
 
-    # We'll be messing with the list, duplicate it
     cursors = list(cursors)
 
     # Invert our jump
     if inverted:
         # Sublime merges adjacent regions, so they cannot overlap
         # THUS inverting it results in a sorted (backwards) list
-        cursors = [cursor for cursor in cursors[::-1]]
-        matches = matches[::-1]
+        # (both are already our own copies, so flip them in place)
+        cursors.reverse()
+        matches.reverse()
 
     # Find the closest cursor to the visible regions
     if len(cursors) == 0:
@@ -238,54 +271,53 @@ def cursor_to_matches(*, cursors, matches, viewport, inverted=False, find_visibl
 
     # The search has Multiple Stages, this ensures we keep circling through them
     # until we're done
+    # (Walking with indices, both only ever increase so this always finishes)
+    match_index = 0
+    cursor_index = 0
+    match_count = len(matches)
+    cursor_count = len(cursors)
 
-    limit = LoopLimit(
-        'Overflowed the search, either there were too many items (over 10000), '
-        'or there is an infinite loop bug'
-    )
-    while len(matches) and len(cursors):
-        limit.count()
+    while match_index < match_count and cursor_index < cursor_count:
+        cursor = cursors[cursor_index]
 
         # Stage 1: Drop matches that are before ANY Cursors
-        while len(matches) and (
+        while match_index < match_count and (
                 # Normal means we're going forwards (compare the starts)
-                (not inverted and cursors[0].begin() >= matches[0].begin())
+                (not inverted and cursor.begin() >= matches[match_index].begin())
                 # Inverted means we're going backwards (compare the ends)
-                or (inverted and cursors[0].end() <= matches[0].end())
+                or (inverted and cursor.end() <= matches[match_index].end())
         ):
-            limit.count()
-
             # Drop elements before the cursor
-            matches.pop(0)
+            match_index += 1
 
         # Stage 2: Early Abort (no Matches left!)
-        if len(matches) == 0:
+        if match_index == match_count:
             # We've exhausted the search
             # Replace all remaining cursors with the looped match
 
-            yield CursorMatch(None, loop_match, is_visible=(visible_cursor in cursors))
+            yield CursorMatch(None, loop_match, is_visible=(visible_cursor in cursors[cursor_index:]))
             return
 
+        match = matches[match_index]
+
         # Stage 3: Jump cursors that are before the next match (with that match)
         was_visible = False
-        replaced_cursors = []
-        while len(cursors) and (
-                (not inverted and cursors[0].begin() <= matches[0].begin())
-                or (inverted and cursors[0].end() >= matches[0].end())
+        first_replaced = cursor_index
+        while cursor_index < cursor_count and (
+                (not inverted and cursors[cursor_index].begin() <= match.begin())
+                or (inverted and cursors[cursor_index].end() >= match.end())
         ):
-            limit.count()
-
             # We found the 'visible cursor' note that down
-            if cursors[0] == visible_cursor:
+            if cursors[cursor_index] == visible_cursor:
                 was_visible = True
 
             # Replace cursors before the match
-            replaced_cursors.append(cursors.pop(0))
+            cursor_index += 1
 
         # All the cursors we just dropped go to this match
         yield CursorMatch(
-            (replaced_cursors[0] if replaced_cursors else None),
-            matches[0],
+            (cursors[first_replaced] if cursor_index > first_replaced else None),
+            match,
             is_visible=was_visible,
         )
 
@@ -334,12 +366,22 @@ class Sentinel:
         return self.__class__.__name__
 
 
+try:
+    # Python 3.10+ does the plain case in C
+    from itertools import pairwise as _pairwise
+except ImportError:
+    _pairwise = None
+
+
 def pairwise(iterable, include_tail=False):
     """
     s -> (s0,s1), (s1,s2), (s2, s3), ...
     s, True -> (s0, s1) ... (sn-1, sn), (sn, None)
 
     """
+    if _pairwise is not None and not include_tail:
+        return _pairwise(iterable)
+
     left, right = itertools.tee(iterable)
     next(right, None)
     if include_tail:
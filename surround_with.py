@@ -2,6 +2,26 @@ import sublime
 import sublime_plugin
 
 
+# The (start, end) to surround the selections with, for each character
+SURROUND_PAIRS = {
+    '{': ('{', '}'),
+    '}': ('{', '}'),
+    '[': ('[', ']'),
+    ']': ('[', ']'),
+    '(': ('(', ')'),
+    ')': ('(', ')'),
+    '<': ('>', '>'),
+    '>': ('>', '>'),
+    # Allow double star for markdown
+    '**': ('**', '**'),
+}
+# Quotes (and some weird characters) are the same on both sides
+SURROUND_PAIRS.update(
+    (character, (character, character))
+    for character in "'\"`*-+_%$|/\\ "
+)
+
+
 class SurroundWith(sublime_plugin.TextCommand):
     '''
     Surrounds the selections with quotes or brackets (basesd on the character passed in)
@@ -13,46 +33,30 @@ class SurroundWith(sublime_plugin.TextCommand):
         # This should already be sorted
         orig_selection = [region for region in self.view.sel()]
 
-        if character in "{}":
-            start = "{"
-            end = "}"
-        elif character in "[]":
-            start = "["
-            end = "]"
-        elif character in "()":
-            start = "("
-            end = ")"
-        elif character in "<>":
-            start = ">"
-            end = ">"
-        elif character == "**":
-            # Allow double star for markdown
-            start = end = character
-        elif character in "'\"`":
-            start = end = character
-        elif character in "*-+_%$|/\\ ":
-            # Also allow weird characters
-            start = end = character
-        else:
+        pair = SURROUND_PAIRS.get(character)
+        if pair is None:
             # TODO: status bar message?
             print("Can't surround with character: '{}'".format(character))
             return;
+        start, end = pair
 
         if expand:
             self.view.run_command("enter_visual_mode")
             self.view.run_command("expand_selection", {"to": "word"})
 
-        for sel in self.view.sel():
+        # Work backwards, so the inserts never move the selections that are still to come
+        # (and the end goes first, so the start doesn't move it either)
+        for sel in reversed(list(self.view.sel())):
+            self.view.insert(edit, sel.end(), end)
             self.view.insert(edit, sel.begin(), start)
-            self.view.insert(edit, sel.end() + len(character), end)
 
         # Reset each selection in order, adding the resulting offset for each change
         offset = 0
-        self.view.sel().clear()
+        new_selection = []
         for selection in orig_selection:
             offset += len(start)
 
-            self.view.sel().add(sublime.Region(
+            new_selection.append(sublime.Region(
                 selection.begin() + offset,
                 selection.end() + offset,
             ))
@@ -60,5 +64,8 @@ class SurroundWith(sublime_plugin.TextCommand):
             # Now add the "end" offset for the next selection
             offset += len(end)
 
+        self.view.sel().clear()
+        self.view.sel().add_all(new_selection)
+
         # Save the transaction
         self.view.end_edit(edit)